@@ -1,68 +1,181 @@
+import asyncio
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from pathlib import Path
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
 import io
-from tqdm import tqdm
-import time
-from datetime import datetime, timedelta
+import json
+import threading
+from pathlib import Path
+from tqdm.asyncio import tqdm as tqdm_asyncio
+from datetime import datetime, timedelta, timezone
 import xml.etree.ElementTree as ET
 
+# Стандартные колонки Binance kline data (в порядке следования в CSV)
+CSV_COLUMNS = [
+    'open_time', 'open', 'high', 'low', 'close', 'volume',
+    'close_time', 'quote_volume', 'trades', 'taker_buy_base',
+    'taker_buy_quote', 'ignore'
+]
+
+# Колонка ignore не несёт данных: её не читаем и не храним
+COLUMNS = [col for col in CSV_COLUMNS if col != 'ignore']
+
+# Известные типы колонок: CSV-ридер не тратит время на их определение.
+# Цены и объёмы остаются float64: во float32 (~7 значащих цифр) объёмы
+# и крупные quote-суммы теряют точность, и сохранённые данные расходятся с архивами
+DTYPES = {
+    'open_time': 'int64',
+    'close_time': 'int64',
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'float64',
+    'quote_volume': 'float64',
+    'trades': 'int32',
+    'taker_buy_base': 'float64',
+    'taker_buy_quote': 'float64',
+}
+
+# Параметры многопоточного CSV-ридера pyarrow: файлы без заголовка,
+# типы колонок заданы заранее, ignore не читается
+CSV_READ_OPTIONS = pacsv.ReadOptions(column_names=CSV_COLUMNS)
+# Для архивов, где первой строкой идёт заголовок (open_time,open,...)
+CSV_HEADER_READ_OPTIONS = pacsv.ReadOptions(column_names=CSV_COLUMNS, skip_rows=1)
+CSV_CONVERT_OPTIONS = pacsv.ConvertOptions(
+    column_types={col: pa.type_for_alias(dtype) for col, dtype in DTYPES.items()},
+    include_columns=COLUMNS,
+)
+
 class BinanceDataCollector:
     """
-    Загружает исторические данные Binance через S3 API, распаковывает и объединяет в один CSV
+    Загружает исторические данные Binance через S3 API, распаковывает и объединяет
+    в один файл (Parquet или CSV)
     """
     
-    def __init__(self, symbol, interval='4h'):
+    def __init__(self, symbol, interval='4h', output_format='parquet', max_concurrency=32,
+                 decode_workers=16, cache_dir=None):
+        if output_format not in ('parquet', 'csv'):
+            raise ValueError(f"Неизвестный формат вывода: {output_format}")
+        
         self.symbol = symbol
         self.interval = interval
-        self.temp_dir = Path(f'temp_{symbol}')
-        self.temp_dir.mkdir(exist_ok=True)
+        # Формат итогового файла: 'parquet' (по умолчанию) или 'csv' для совместимости
+        self.output_format = output_format
+        # Максимальное число одновременных загрузок с S3
+        self.max_concurrency = max_concurrency
+        # Потоки для распаковки архивов параллельно с загрузками
+        self.decode_workers = decode_workers
+        # Кэш на диске (список архивов и сами архивы), общий для всех запусков
+        self.cache_dir = Path(cache_dir) if cache_dir else Path.home() / '.cache' / 'binance_klines'
+        # Запись архивов в кэш отключается до конца запуска после первой ошибки
+        self._cache_disabled = False
+        self._cache_lock = threading.Lock()
         
         # AWS S3 endpoints для Binance
         self.s3_base = 'https://s3-ap-northeast-1.amazonaws.com/data.binance.vision'
         
+        # Общая сессия: keep-alive и пул соединений вместо нового TCP+TLS на каждый
+        # запрос, повторы при 5xx выполняет urllib3
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        self.session.mount(
+            'https://',
+            HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+        )
+        
+    @staticmethod
+    def open_datetime(df):
+        """Время открытия свечей (UTC), вычисляется из open_time по требованию"""
+        return pd.to_datetime(df['open_time'], unit='ms', utc=True)
+    
     def get_zip_links(self):
-        """Получает список всех .zip файлов через S3 API"""
+        """
+        Получает список всех .zip файлов через S3 API (ListObjectsV2 с пагинацией).
+        Список кэшируется на диске на текущий день
+        """
         print(f"\n📊 Получаю список файлов для {self.symbol}...")
         
+        listing_dir = self.cache_dir / self.symbol / self.interval
+        listing_file = listing_dir / f'listing-{datetime.now():%Y-%m-%d}.json'
+        
+        if listing_file.exists():
+            try:
+                keys = json.loads(listing_file.read_text())
+            except (OSError, ValueError) as e:
+                # Повреждённый кэш не должен ломать сбор: удаляем и читаем S3
+                print(f"⚠️  Повреждённый список файлов в кэше, запрашиваю заново: {e}")
+                try:
+                    listing_file.unlink(missing_ok=True)
+                except OSError:
+                    pass
+            else:
+                print(f"✅ Найдено {len(keys)} архивов (из кэша)")
+                return [f'{self.s3_base}/{key}' for key in keys]
+        
         # Формируем запрос к S3 API
         prefix = f'data/spot/monthly/klines/{self.symbol}/{self.interval}/'
-        url = f'{self.s3_base}?delimiter=/&prefix={prefix}'
+        params = {'list-type': 2, 'delimiter': '/', 'prefix': prefix, 'max-keys': 1000}
         
         try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
+            keys = []
             
-            # Парсим XML ответ от S3
-            root = ET.fromstring(response.content)
-            
-            # Namespace для S3 XML
-            ns = {'s3': 'http://s3.amazonaws.com/doc/2006-03-01/'}
-            
-            zip_links = []
+            # Листаем страницы, пока S3 сообщает, что список обрезан
+            while True:
+                truncated = False
+                token = None
+                
+                # Разбираем XML ответ от S3 потоково, не строя полное дерево.
+                # Namespace у тегов отбрасываем, так что работает и с ним, и без него
+                with self.session.get(self.s3_base, params=params, timeout=30, stream=True) as response:
+                    response.raise_for_status()
+                    response.raw.decode_content = True
+                    
+                    for _, elem in ET.iterparse(response.raw, events=('end',)):
+                        tag = elem.tag.rsplit('}', 1)[-1]
+                        if tag == 'Key' and elem.text.endswith('.zip'):
+                            keys.append(elem.text)
+                        elif tag == 'IsTruncated':
+                            truncated = elem.text == 'true'
+                        elif tag == 'NextContinuationToken':
+                            token = elem.text
+                        elif tag == 'Contents':
+                            # Обработанный файл больше не нужен
+                            elem.clear()
+                
+                if not truncated or token is None:
+                    break
+                params['continuation-token'] = token
             
-            # Ищем все Contents элементы (файлы)
-            for content in root.findall('s3:Contents', ns):
-                key = content.find('s3:Key', ns)
-                if key is not None and key.text.endswith('.zip'):
-                    file_url = f'{self.s3_base}/{key.text}'
-                    zip_links.append(file_url)
+            keys.sort()
+            print(f"✅ Найдено {len(keys)} архивов")
             
-            # Если namespace не сработал, пробуем без него
-            if not zip_links:
-                for content in root.findall('Contents'):
-                    key = content.find('Key')
-                    if key is not None and key.text.endswith('.zip'):
-                        file_url = f'{self.s3_base}/{key.text}'
-                        zip_links.append(file_url)
+            if keys:
+                # Сохраняем список на сегодня, старые списки удаляем.
+                # Кэш не обязателен: ошибка записи не мешает загрузке
+                try:
+                    listing_dir.mkdir(parents=True, exist_ok=True)
+                    for old_file in listing_dir.glob('listing-*.json'):
+                        old_file.unlink()
+                    # Пишем атомарно, чтобы прерванная запись не оставила обрезанный файл
+                    tmp_file = listing_file.with_suffix('.tmp')
+                    tmp_file.write_text(json.dumps(keys))
+                    tmp_file.replace(listing_file)
+                except OSError as e:
+                    print(f"⚠️  Не удалось сохранить список файлов в кэш: {e}")
             
-            print(f"✅ Найдено {len(zip_links)} архивов")
-            return sorted(zip_links)
+            return [f'{self.s3_base}/{key}' for key in keys]
             
         except Exception as e:
             print(f"❌ Ошибка при получении списка файлов: {e}")
-            print(f"URL: {url}")
+            print(f"URL: {self.s3_base}?prefix={prefix}")
             
             # Запасной вариант: генерируем URLs по известному паттерну
             print("\n🔄 Пробую альтернативный метод (генерация URLs)...")
@@ -73,105 +186,240 @@ class BinanceDataCollector:
         Генерирует URLs по известному паттерну Binance:
         SYMBOL-INTERVAL-YEAR-MONTH.zip
         """
-        zip_links = []
-        
         # Определяем диапазон дат
         # BTC торгуется с 2017, ETH примерно с 2017-2018
         start_year = 2017 if self.symbol == 'BTCUSDT' else 2018
-        end_date = datetime.now()
         
-        current = datetime(start_year, 1, 1)
+        # Начала месяцев от января start_year до текущего месяца включительно
+        months = pd.date_range(datetime(start_year, 1, 1), datetime.now(), freq='MS')
         
-        while current <= end_date:
-            year = current.year
-            month = str(current.month).zfill(2)
-            
-            filename = f'{self.symbol}-{self.interval}-{year}-{month}.zip'
-            url = f'{self.s3_base}/data/spot/monthly/klines/{self.symbol}/{self.interval}/{filename}'
-            
-            zip_links.append(url)
-            
-            # Переходим к следующему месяцу
-            if current.month == 12:
-                current = datetime(current.year + 1, 1, 1)
-            else:
-                current = datetime(current.year, current.month + 1, 1)
+        base = f'{self.s3_base}/data/spot/monthly/klines/{self.symbol}/{self.interval}'
+        zip_links = [
+            f'{base}/{self.symbol}-{self.interval}-{d.year}-{d.month:02d}.zip'
+            for d in months
+        ]
         
         print(f"✅ Сгенерировано {len(zip_links)} потенциальных URLs")
         return zip_links
     
-    def download_and_extract(self, url, retries=3):
-        """Скачивает и распаковывает один архив с повторными попытками"""
+    @staticmethod
+    def _read_zip(zip_source):
+        """
+        Читает CSV из архива (путь или файловый объект) и возвращает
+        pyarrow.Table со строками klines
+        """
+        with zipfile.ZipFile(zip_source) as z:
+            # Обычно в архиве один CSV файл
+            for filename in z.namelist():
+                if filename.endswith('.csv'):
+                    with z.open(filename) as f:
+                        # Строки данных начинаются с timestamp'а; если первая
+                        # строка начинается не с цифры, это заголовок — пропускаем
+                        has_header = not f.peek(1)[:1].isdigit()
+                        return pacsv.read_csv(
+                            f,
+                            read_options=CSV_HEADER_READ_OPTIONS if has_header else CSV_READ_OPTIONS,
+                            convert_options=CSV_CONVERT_OPTIONS
+                        )
+        
+        return None
+    
+    def _archive_cache_path(self, url):
+        """Путь к архиву в кэше: cache_dir/SYMBOL/INTERVAL/<имя архива>"""
+        return self.cache_dir / self.symbol / self.interval / url.rsplit('/', 1)[-1]
+    
+    @staticmethod
+    def _is_closed_month(cache_path):
+        """
+        Проверяет, что архив SYMBOL-INTERVAL-YEAR-MONTH.zip относится к уже
+        закончившемуся месяцу: такие архивы больше не меняются
+        """
+        year, month = cache_path.stem.rsplit('-', 2)[-2:]
+        return f'{year}-{month}' < datetime.now(timezone.utc).strftime('%Y-%m')
+    
+    def _store_and_read(self, cache_path, content, etag):
+        """
+        Читает скачанный архив из памяти и, если он корректен, сохраняет его
+        (и его ETag) в кэш. Кэш не обязателен: ошибка записи не мешает загрузке
+        """
+        # BytesIO разделяет буфер с неизменяемым bytes без копирования
+        table = self._read_zip(io.BytesIO(content))
+        if table is None:
+            return None
+        
+        if self._cache_disabled:
+            return table
+        
+        etag_path = cache_path.with_suffix('.etag')
+        try:
+            # Старый ETag удаляем до замены архива, чтобы он не остался
+            # от предыдущей версии, если запись прервётся
+            etag_path.unlink(missing_ok=True)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix('.tmp')
+            tmp_path.write_bytes(content)
+            tmp_path.replace(cache_path)
+            if etag:
+                etag_path.write_text(etag)
+        except OSError as e:
+            # Предупреждаем один раз и больше не пытаемся писать в этом запуске
+            with self._cache_lock:
+                if not self._cache_disabled:
+                    self._cache_disabled = True
+                    print(f"⚠️  Не удалось сохранить архив в кэш, кэширование отключено: {e}")
+        
+        return table
+    
+    @staticmethod
+    def _cached_state(cache_path):
+        """
+        Возвращает (есть ли архив в кэше, его ETag или None).
+        Блокирующий ввод-вывод: вызывается в пуле потоков, а не в event loop
+        """
+        try:
+            if not (cache_path.exists() and cache_path.stat().st_size > 0):
+                return False, None
+            etag_path = cache_path.with_suffix('.etag')
+            return True, etag_path.read_text() if etag_path.exists() else None
+        except OSError:
+            return False, None
+    
+    def _read_cached(self, cache_path):
+        """Читает архив из кэша; повреждённый архив удаляет и возвращает None"""
+        try:
+            table = self._read_zip(cache_path)
+        except Exception as e:
+            print(f"⚠️  Повреждённый архив в кэше {cache_path.name}, скачиваю заново: {e}")
+            table = None
+        
+        if table is None:
+            try:
+                cache_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+        return table
+    
+    async def download_and_extract(self, session, semaphore, executor, url, retries=3):
+        """
+        Скачивает архив (или берёт его из кэша на диске) и читает CSV из памяти.
+        Возвращает pyarrow.Table со строками klines или None
+        """
+        # Вся работа с файловой системой выполняется в пуле потоков
+        loop = asyncio.get_running_loop()
+        cache_path = self._archive_cache_path(url)
+        cached, etag = await loop.run_in_executor(executor, self._cached_state, cache_path)
+        
+        # Архивы закончившихся месяцев неизменны: читаем из кэша без запроса к S3
+        if cached and self._is_closed_month(cache_path):
+            table = await loop.run_in_executor(executor, self._read_cached, cache_path)
+            if table is not None:
+                return table
+            cached = False
+        
+        # Текущий месяц может дополняться: перепроверяем кэш условным запросом по ETag
+        headers = {'If-None-Match': etag} if cached and etag else {}
+        
         for attempt in range(retries):
             try:
-                # Скачиваем архив в память
-                response = requests.get(url, timeout=60)
+                # Скачиваем архив в память, ограничивая число одновременных загрузок
+                async with semaphore:
+                    async with session.get(url, headers=headers) as response:
+                        # Если файл не найден (404), пропускаем
+                        if response.status == 404:
+                            return None
+                        
+                        # Архив не изменился с прошлой загрузки
+                        if response.status == 304:
+                            content = None
+                        else:
+                            response.raise_for_status()
+                            content = await response.read()
+                            etag = response.headers.get('ETag')
                 
-                # Если файл не найден (404), пропускаем
-                if response.status_code == 404:
-                    return None
-                    
-                response.raise_for_status()
-                
-                # Распаковываем
-                with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                    # Обычно в архиве один CSV файл
-                    for filename in z.namelist():
-                        if filename.endswith('.csv'):
-                            # Извлекаем во временную директорию
-                            z.extract(filename, self.temp_dir)
-                            return self.temp_dir / filename
+                # Распаковываем в пуле потоков, чтобы не блокировать event loop:
+                # zlib и парсер CSV отпускают GIL, распаковка идёт параллельно
+                # с остальными загрузками
+                if content is None:
+                    table = await loop.run_in_executor(executor, self._read_cached, cache_path)
+                    if table is not None:
+                        return table
+                    # Кэш оказался повреждённым: скачиваем без условного запроса
+                    headers = {}
+                    continue
+                return await loop.run_in_executor(
+                    executor, self._store_and_read, cache_path, content, etag
+                )
                 
+            except pa.ArrowInvalid as e:
+                # Ошибка разбора CSV не исчезнет при повторной загрузке
+                print(f"⚠️  Некорректные данные в {url.split('/')[-1]}: {e}")
                 return None
-                
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code != 404:
+            except aiohttp.ClientResponseError as e:
+                if e.status != 404:
                     if attempt < retries - 1:
-                        time.sleep(2)  # Пауза перед повтором
+                        await asyncio.sleep(2)  # Пауза перед повтором
                         continue
                     print(f"⚠️  HTTP ошибка при обработке {url}: {e}")
                 return None
             except Exception as e:
                 if attempt < retries - 1:
-                    time.sleep(2)  # Пауза перед повтором
+                    await asyncio.sleep(2)  # Пауза перед повтором
                     continue
                 print(f"⚠️  Ошибка при обработке {url}: {e}")
                 return None
         
         return None
     
-    def merge_csv_files(self, csv_files, output_filename):
-        """Объединяет все CSV файлы в один"""
-        print(f"\n🔄 Объединяю {len(csv_files)} файлов...")
-        
-        # Стандартные колонки Binance kline data
-        columns = [
-            'open_time', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-            'taker_buy_quote', 'ignore'
-        ]
-        
-        dfs = []
-        for csv_file in tqdm(csv_files, desc="Чтение файлов"):
-            try:
-                df = pd.read_csv(csv_file, names=columns, header=None)
-                dfs.append(df)
-            except Exception as e:
-                print(f"⚠️  Ошибка чтения {csv_file}: {e}")
+    async def _collect_async(self, zip_links):
+        """Параллельно скачивает все архивы через одну aiohttp-сессию"""
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=60)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Каждый запуск заново пробует писать в кэш
+        self._cache_disabled = False
+        
+        with ThreadPoolExecutor(max_workers=self.decode_workers) as executor:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                tasks = [
+                    self.download_and_extract(session, semaphore, executor, url)
+                    for url in zip_links
+                ]
+                # gather сохраняет порядок результатов в соответствии с zip_links;
+                # прогресс-бар перерисовываем пачками, а не на каждый архив
+                return await tqdm_asyncio.gather(
+                    *tasks, desc="Загрузка", mininterval=0.5, miniters=5
+                )
+    
+    @staticmethod
+    def _run_async(coro):
+        """
+        Выполняет корутину до завершения. Внутри уже запущенного event loop
+        (например, в Jupyter) asyncio.run запрещён, поэтому там корутина
+        выполняется в отдельном потоке со своим циклом
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
         
-        if not dfs:
-            print("❌ Нет данных для объединения")
-            return None
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, coro).result()
+    
+    def merge_csv_files(self, tables, output_filename):
+        """
+        Объединяет прочитанные из архивов таблицы в один файл.
+        Расширение output_filename заменяется в соответствии с output_format
+        """
+        print(f"\n🔄 Объединяю {len(tables)} файлов...")
         
-        # Объединяем все данные
-        merged_df = pd.concat(dfs, ignore_index=True)
+        # pa.concat_tables склеивает таблицы без копирования данных; валидация,
+        # сортировка и удаление дубликатов выполняются в Arrow, а DataFrame
+        # строится один раз в самом конце
+        table = pa.concat_tables(tables)
         
         # Валидация и очистка timestamp'ов
         print("🔍 Проверяю корректность timestamp'ов...")
-        initial_rows = len(merged_df)
-        
-        # Конвертируем в numeric, некорректные станут NaN
-        merged_df['open_time'] = pd.to_numeric(merged_df['open_time'], errors='coerce')
+        initial_rows = table.num_rows
         
         # Разумные границы для криптовалютных данных:
         # Min: 2009-01-01 (начало Bitcoin) = 1230768000000 ms
@@ -179,54 +427,69 @@ class BinanceDataCollector:
         min_timestamp = 1230768000000  # 2009-01-01
         max_timestamp = int((datetime.now() + timedelta(days=365)).timestamp() * 1000)
         
-        # Фильтруем некорректные timestamp'ы
-        valid_mask = (
-            merged_df['open_time'].notna() & 
-            (merged_df['open_time'] >= min_timestamp) & 
-            (merged_df['open_time'] <= max_timestamp)
+        # Фильтруем некорректные timestamp'ы (пустые значения тоже отбрасываем).
+        # Все шаги ниже работают только с колонкой open_time и индексами строк:
+        # полная таблица копируется один раз, в итоговом take
+        ts = table['open_time']
+        valid_mask = pc.fill_null(
+            pc.and_(pc.greater_equal(ts, min_timestamp), pc.less_equal(ts, max_timestamp)),
+            False
         )
+        valid_idx = pc.indices_nonzero(valid_mask)
         
-        invalid_count = (~valid_mask).sum()
+        invalid_count = initial_rows - len(valid_idx)
         if invalid_count > 0:
             print(f"⚠️  Найдено {invalid_count} некорректных timestamp'ов, удаляю...")
         
-        merged_df = merged_df[valid_mask].copy()
-        
-        # Сортируем по времени
-        merged_df = merged_df.sort_values('open_time').reset_index(drop=True)
+        if len(valid_idx) == 0:
+            print("❌ Нет корректных данных для сохранения")
+            return None
         
-        # Удаляем дубликаты
-        before_dedup = len(merged_df)
-        merged_df = merged_df.drop_duplicates(subset='open_time', keep='first')
-        duplicates_removed = before_dedup - len(merged_df)
+        # Сортируем (sort_indices стабилен) и оставляем первое вхождение каждого
+        # timestamp'а: в отсортированном ряду оно отличается от предыдущего значения
+        valid_ts = ts.take(valid_idx)
+        order = pc.sort_indices(valid_ts)
+        sorted_ts = valid_ts.take(order).combine_chunks()
+        first_mask = pa.concat_arrays([
+            pa.array([True]),
+            pc.not_equal(sorted_ts[1:], sorted_ts[:-1]),
+        ])
+        row_idx = valid_idx.take(order.filter(first_mask))
+        
+        duplicates_removed = len(valid_idx) - len(row_idx)
         if duplicates_removed > 0:
             print(f"🔄 Удалено {duplicates_removed} дубликатов")
         
-        # Конвертируем timestamp в datetime
-        merged_df['datetime'] = pd.to_datetime(merged_df['open_time'], unit='ms', utc=True)
-        
-        # Переставляем колонки для удобства
-        cols = ['datetime', 'open_time'] + [col for col in merged_df.columns if col not in ['datetime', 'open_time']]
-        merged_df = merged_df[cols]
-        
-        # Сохраняем
-        merged_df.to_csv(output_filename, index=False)
-        
+        # Один take заполняет заранее выделенные итоговые колонки; self_destruct
+        # освобождает буферы Arrow по мере конвертации, не удваивая пик памяти.
+        # split_blocks оставляет каждую колонку отдельным 1D-массивом со своим
+        # dtype, без консолидации однотипных колонок в общие 2D-блоки pandas
+        merged_df = table.take(row_idx).to_pandas(split_blocks=True, self_destruct=True)
+        
+        # Сохраняем. datetime не храним в DataFrame: он целиком выводится из open_time
+        # (см. open_datetime) и вычисляется только для CSV, где нужен для совместимости
+        output_filename = Path(output_filename).with_suffix(f'.{self.output_format}')
+        if self.output_format == 'parquet':
+            # Данные только числовые: словарное кодирование не даёт выигрыша
+            merged_df.to_parquet(
+                output_filename, engine='pyarrow', compression='zstd',
+                index=False, use_dictionary=False
+            )
+        else:
+            csv_df = merged_df.drop(columns='open_time')
+            csv_df.insert(0, 'datetime', self.open_datetime(merged_df))
+            csv_df.to_csv(output_filename, index=False)
+        
+        # Данные отсортированы по времени: период — это первая и последняя свечи
+        start, end = self.open_datetime(merged_df.iloc[[0, -1]])
         print(f"\n✅ Данные сохранены в {output_filename}")
         print(f"📈 Всего записей: {len(merged_df):,} (отфильтровано {initial_rows - len(merged_df)} некорректных)")
-        print(f"📅 Период: {merged_df['datetime'].min()} - {merged_df['datetime'].max()}")
+        print(f"📅 Период: {start} - {end}")
         
         return merged_df
     
-    def cleanup(self):
-        """Удаляет временные файлы"""
-        import shutil
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-            print(f"🧹 Временные файлы удалены")
-    
     def collect(self, output_filename):
-        """Основной метод: скачивает, распаковывает и объединяет данные"""
+        """Основной метод: скачивает, читает в памяти и объединяет данные"""
         print(f"\n{'='*60}")
         print(f"🚀 Начинаю сбор данных для {self.symbol}")
         print(f"{'='*60}")
@@ -239,22 +502,22 @@ class BinanceDataCollector:
             return None
         
         # Скачиваем и распаковываем
-        csv_files = []
+        tables = []
         failed_urls = []
         print(f"\n⬇️  Скачиваю и распаковываю архивы...")
         
         successful = 0
         failed = 0
         
-        for url in tqdm(zip_links, desc="Загрузка"):
-            csv_file = self.download_and_extract(url)
-            if csv_file:
-                csv_files.append(csv_file)
+        results = self._run_async(self._collect_async(zip_links))
+        
+        for url, table in zip(zip_links, results):
+            if table is not None:
+                tables.append(table)
                 successful += 1
             else:
                 failed += 1
                 failed_urls.append(url)
-            time.sleep(0.1)  # Небольшая пауза между запросами
         
         print(f"\n📊 Успешно: {successful}, Пропущено: {failed}")
         
@@ -263,15 +526,12 @@ class BinanceDataCollector:
             for url in failed_urls:
                 print(f"   - {url.split('/')[-1]}")
         
-        if not csv_files:
+        if not tables:
             print("❌ Не удалось загрузить файлы")
             return None
         
         # Объединяем
-        df = self.merge_csv_files(csv_files, output_filename)
-        
-        # Очищаем временные файлы
-        self.cleanup()
+        df = self.merge_csv_files(tables, output_filename)
         
         return df
 
@@ -286,14 +546,17 @@ def main():
     print("="*60)
     
     # Настройки
+    # Dataset.ipynb читает *_4h_full.csv с колонкой datetime, поэтому для него
+    # сохраняем CSV; 'parquet' — после перевода ноутбука на чтение Parquet
+    output_format = 'csv'
     pairs = [
         {
             'symbol': 'BTCUSDT',
-            'output': 'BTCUSDT_4h_full.csv'
+            'output': 'BTCUSDT_4h_full'
         },
         {
             'symbol': 'ETHUSDT',
-            'output': 'ETHUSDT_4h_full.csv'
+            'output': 'ETHUSDT_4h_full'
         }
     ]
     
@@ -302,7 +565,8 @@ def main():
     for pair in pairs:
         collector = BinanceDataCollector(
             symbol=pair['symbol'],
-            interval='4h'
+            interval='4h',
+            output_format=output_format
         )
         
         df = collector.collect(pair['output'])
@@ -318,9 +582,10 @@ def main():
     for symbol, df in results.items():
         if df is not None:
             print(f"\n{symbol}:")
-            print(f"  📄 Файл: {symbol}_4h_full.csv")
+            print(f"  📄 Файл: {symbol}_4h_full.{output_format}")
             print(f"  📊 Записей: {len(df):,}")
-            print(f"  📅 Период: {df['datetime'].min()} - {df['datetime'].max()}")
+            start, end = BinanceDataCollector.open_datetime(df.iloc[[0, -1]])
+            print(f"  📅 Период: {start} - {end}")
             print(f"  💾 Размер: ~{df.memory_usage(deep=True).sum() / 1024**2:.1f} MB в памяти")
     
     print("\n✨ Готово! Можно переходить к EDA и построению фичей.")